@@ -10,6 +10,9 @@ import random
 import pathlib
 import urllib.parse
 import json
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # ===== 0.5) 내부 상세 URL 헬퍼 =====
 def ensure_dir(path: str):
@@ -18,17 +21,19 @@ def ensure_dir(path: str):
     except Exception:
         pass
 
-def get_detail_paths(item: dict) -> tuple[str, str]:
+def get_detail_paths(item: dict, site_url: str | None = None) -> tuple[str, str]:
     """
     내부 상세 페이지의 (로컬 파일 경로, 퍼블릭 URL)을 돌려준다.
     기본 규칙: /p/{productId}.html
     productId가 없으면 (상품명|쿠팡링크) 해시로 대체.
+    site_url 미지정 시 SITE_URL 기준(멀티 사이트에서는 사이트별 base URL).
     """
+    site_url = site_url or SITE_URL
     pid = item.get("productId")
     if pid:
         pid = str(pid)
         local = os.path.join("p", f"{pid}.html")
-        url   = f"{SITE_URL}p/{pid}.html"
+        url   = f"{site_url}p/{pid}.html"
         return local, url
 
     name = (item.get("productName") or "item").strip()
@@ -36,7 +41,7 @@ def get_detail_paths(item: dict) -> tuple[str, str]:
     key  = (name + "|" + out).encode("utf-8")
     h    = hashlib.md5(key).hexdigest()[:10]
     local = os.path.join("p", f"{h}.html")
-    url   = f"{SITE_URL}p/{h}.html"
+    url   = f"{site_url}p/{h}.html"
     return local, url
 
 def _fmt_price_safe(v):
@@ -140,23 +145,31 @@ def build_product_detail_html(item: dict, detail_url: str) -> str:
 """
     return html
 
-def write_product_detail_pages(items: list):
+def write_product_detail_pages(items: list, site_url: str | None = None, root: str = ".", site: str = "", done: set | None = None):
     """
-    오늘 배치(items)에 대해 /p/{productId}.html 상세 페이지 파일 생성.
+    오늘 배치(items)에 대해 {root}/p/{productId}.html 상세 페이지 파일 생성.
+    done: 저널에 이미 기록된 (site, 상대경로) 집합 → 파일이 남아 있으면 건너뜀(재개).
     """
-    ensure_dir("p")
-    written = 0
+    ensure_dir(os.path.join(root, "p"))
+    written = skipped = 0
     for it in items:
-        local, url = get_detail_paths(it)
+        rel, url = get_detail_paths(it, site_url)
+        local = os.path.join(root, rel)
+        if done and (site, rel) in done and os.path.exists(local):
+            skipped += 1
+            continue
         try:
             html = build_product_detail_html(it, url)
             with open(local, "w", encoding="utf-8") as f:
                 f.write(html)
+                f.flush()
+                os.fsync(f.fileno())  # 디스크 반영 후에 저널 기록(잘린 파일이 '완료'로 남지 않게)
+            journal_append({"ev": "page", "site": site, "path": rel})
             written += 1
         except Exception as e:
             print("[WARN] detail write fail:", local, e)
     if DEBUG:
-        print(f"[DETAIL] written={written}")
+        print(f"[DETAIL] written={written} skipped={skipped}")
 
 # ===== 1) 환경/설정 로드 =====
 ACCESS_KEY = os.getenv("ACCESS_KEY")
@@ -208,15 +221,17 @@ def _load_recent_keywords(path=".last_cats.json"):
     except:
         return []
 
-def _save_recent_keywords(keywords, path=".last_cats.json"):
+def _save_recent_keywords(keywords, path=".last_cats.json", out_path=None):
     hist = _load_recent_keywords(path)
     hist.insert(0, keywords)
     hist = hist[:COOLDOWN_RUNS]
-    with open(path,"w",encoding="utf-8") as f:
+    with open(out_path or path,"w",encoding="utf-8") as f:
         json.dump(hist, f, ensure_ascii=False)
 
-def pick_keywords_for_today(pool: list[str], k: int = KEYWORDS_PER_RUN) -> list[str]:
-    prev = _load_recent_keywords()
+def pick_keywords_for_today(pool: list[str], k: int = KEYWORDS_PER_RUN, path: str = ".last_cats.json",
+                            out_path: str | None = None) -> list[str]:
+    """path의 쿨다운 기록을 참고해 k개 선택. 갱신된 기록은 out_path(기본=path)에 저장."""
+    prev = _load_recent_keywords(path)
     recent_flat = set(x for lst in prev for x in lst)
     cand = [x for x in pool if x not in recent_flat]
     random.shuffle(cand)
@@ -225,9 +240,86 @@ def pick_keywords_for_today(pool: list[str], k: int = KEYWORDS_PER_RUN) -> list[
         rest = [x for x in pool if x not in chosen]
         random.shuffle(rest)
         chosen += rest[:(k - len(chosen))]
-    _save_recent_keywords(chosen)
+    _save_recent_keywords(chosen, path, out_path)
     return chosen
 
+# ===== 1.5) 런 저널(중단 후 재개) =====
+# append-only JSONL. 첫 줄 = run 헤더(UTC 날짜), 이후 한 줄 = 완료된 작업 1건:
+#   plan(사이트별 오늘 키워드) / fetch(키워드 검색 결과) / pick(사이트별 선정 상품)
+#   page(스테이징에 쓴 상세 페이지) / swap(스테이징 → 실제 경로 이동 목록)
+# 스왑까지 끝나면 파일 삭제. 오늘 날짜 저널이 남아 있으면 다음 실행이 이어서 진행한다.
+RUN_JOURNAL = os.getenv("RUN_JOURNAL", ".run_journal.jsonl")   # 빈 값이면 저널 끔
+STAGING_DIRNAME = ".staging"                                   # 출력 루트별 스테이징 폴더
+_journal_lock = threading.Lock()
+
+def journal_append(rec: dict, path: str | None = None):
+    path = RUN_JOURNAL if path is None else path
+    if not path:
+        return
+    line = json.dumps(rec, ensure_ascii=False) + "\n"
+    with _journal_lock:  # 사이트 렌더 스레드에서 동시에 호출됨
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+def _run_date() -> str:
+    return time.strftime('%Y-%m-%d', time.gmtime())
+
+def journal_load(path: str | None = None) -> dict:
+    path = RUN_JOURNAL if path is None else path
+    state = {"date": None, "resumed": False, "plan": {}, "fetched": {}, "picked": {}, "pages": set(), "swap": None}
+    if not path:
+        return state
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return state
+    for line in lines:
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            continue  # 기록 도중 죽어 잘린 마지막 줄
+        ev = rec.get("ev")
+        if ev == "run":
+            state["date"] = rec.get("date")
+        elif ev == "plan":
+            state["plan"][rec["site"]] = rec["keywords"]
+        elif ev == "fetch":
+            state["fetched"][rec["kw"]] = rec["items"]
+        elif ev == "pick":
+            state["picked"][rec["site"]] = rec["products"]
+        elif ev == "page":
+            state["pages"].add((rec["site"], rec["path"]))
+        elif ev == "swap":
+            state["swap"] = {"roots": rec["roots"], "files": rec["files"]}
+    state["resumed"] = state["date"] == _run_date()
+    if not state["resumed"]:
+        # 헤더 없음/오늘이 아닌 저널: 옛 키워드·상품(가격)을 오늘 것으로 내보내지 않도록 재개하지 않음.
+        # 스왑 도중 중단된 기록만은 이미 반쯤 반영된 출력을 맞추기 위해 남겨 둔다.
+        if lines:
+            print("[JOURNAL] stale journal discarded, date=", state["date"])
+        state.update({"plan": {}, "fetched": {}, "picked": {}, "pages": set()})
+    if DEBUG:
+        print(f"[JOURNAL] resume plan={len(state['plan'])} fetched={len(state['fetched'])} "
+              f"picked={len(state['picked'])} pages={len(state['pages'])} swap={state['swap'] is not None}")
+    return state
+
+def journal_clear(path: str | None = None):
+    path = RUN_JOURNAL if path is None else path
+    if path and os.path.exists(path):
+        os.remove(path)
+
+def journal_begin(state: dict, roots: list[str]):
+    """오늘 저널을 재개하는 게 아니면 이전 스테이징/저널을 버리고 날짜 헤더로 새 런 시작."""
+    if state["resumed"]:
+        return
+    for root in roots:
+        shutil.rmtree(os.path.join(root, STAGING_DIRNAME), ignore_errors=True)
+    journal_clear()
+    journal_append({"ev": "run", "date": _run_date()})
+
 # ===== 2) 시작 로그(디버그) =====
 def _mask(v):
     return "(none)" if not v else f"len={len(v)} head={v[:3]}***"
@@ -348,8 +440,8 @@ def fetch_products(keyword: str):
 
     def norm(p: dict) -> dict:
         product_id = p.get("productId")
+        # 정규화 결과는 여러 사이트가 공유 → 상대 경로만 저장(절대 URL은 get_detail_paths(item, site_url)로 사이트별 계산)
         internal_path = f"p/{product_id}.html" if product_id else None
-        internal_url  = f"{SITE_URL}p/{product_id}.html" if product_id else None
         category = p.get("categoryName") or p.get("category") or ""
         return {
             "productName":  p.get("productName") or p.get("title") or "",
@@ -360,14 +452,13 @@ def fetch_products(keyword: str):
             "rank":         p.get("rank"),
             "category":     category,
             "internalPath": internal_path,
-            "internalUrl":  internal_url,
         }
 
     items = [norm(x) for x in candidates if isinstance(x, dict)]
     if DEBUG:
         print("PARSED_COUNT=", len(items))
         if items:
-            print("FIRST_ITEM_SAMPLE=", {k: items[0].get(k) for k in ("productName","productPrice","imageUrl","productUrl","productId","internalPath","internalUrl")})
+            print("FIRST_ITEM_SAMPLE=", {k: items[0].get(k) for k in ("productName","productPrice","imageUrl","productUrl","productId","internalPath")})
             lp, lu = get_detail_paths(items[0])
             print("DETAIL_SAMPLE_PATH_URL=", lp, lu)
     return items
@@ -376,19 +467,37 @@ def fetch_products(keyword: str):
 MAX_PER_CATEGORY = 2
 TARGET_COUNT = int(os.getenv("COUNT","30"))
 
-def fetch_random_products():
-    keywords_today = pick_keywords_for_today(BIG_CATEGORY_POOL, k=KEYWORDS_PER_RUN)
+def fetch_keyword_items(kw: str, cache: dict | None = None) -> list:
+    """
+    키워드 1개 검색 결과(정규화 완료).
+    cache(dict)가 주어지면 키워드당 API 호출은 한 번만 하고 이후엔 같은 리스트를 돌려준다.
+    """
+    if cache is not None and kw in cache:
+        return cache[kw]
+    try:
+        items = fetch_products(kw) or []
+    except Exception as e:
+        if DEBUG: print("[WARN] fetch fail:", kw, e)
+        items = []
+    if items:
+        # 빈 결과(타임아웃/HTTP 오류 포함)는 기록하지 않음 → 재개 시 다시 시도
+        journal_append({"ev": "fetch", "kw": kw, "items": items})
+    if cache is not None:
+        cache[kw] = items
+    return items
+
+def fetch_random_products(keywords_today: list[str] | None = None, target_count: int | None = None, cache: dict | None = None):
+    if keywords_today is None:
+        keywords_today = pick_keywords_for_today(BIG_CATEGORY_POOL, k=KEYWORDS_PER_RUN)
+    target_count = target_count or TARGET_COUNT
 
     raw = []
     for kw in keywords_today:
-        try:
-            items = fetch_products(kw) or []
-        except Exception as e:
-            if DEBUG: print("[WARN] fetch fail:", kw, e)
-            items = []
-        random.shuffle(items)
+        items = fetch_keyword_items(kw, cache)
+        # 캐시 리스트는 여러 사이트가 공유 → 원본은 건드리지 않고 참조 순서만 섞는다
+        items = random.sample(items, len(items))
         raw.extend((kw, x) for x in items[:5])
-        if len(raw) > TARGET_COUNT * 4:
+        if len(raw) > target_count * 4:
             break
 
     seen, dedup = set(), []
@@ -407,26 +516,49 @@ def fetch_random_products():
             continue
         picked.append(it)
         per_cat[kw] = c + 1
-        if len(picked) >= TARGET_COUNT:
+        if len(picked) >= target_count:
             break
 
-    if len(picked) < TARGET_COUNT:
+    if len(picked) < target_count:
         for _, it in dedup:
             if it not in picked:
                 picked.append(it)
-                if len(picked) >= TARGET_COUNT:
+                if len(picked) >= target_count:
                     break
 
     if DEBUG:
         top = sorted(per_cat.items(), key=lambda x: -x[1])[:10]
         print("[MIX] cats picked:", top, "total=", len(picked))
 
-    return picked[:TARGET_COUNT]
+    return picked[:target_count]
+
+def plan_keywords(state: dict, site: str, pool: list[str], k: int = KEYWORDS_PER_RUN, root: str = ".") -> list[str]:
+    """
+    저널에 오늘 키워드가 있으면 그대로, 없으면 새로 뽑아 기록.
+    갱신된 {root}/.last_cats.json 은 스테이징에 써서 다른 출력과 함께 스왑.
+    """
+    kws = state["plan"].get(site)
+    if kws is None:
+        stage = os.path.join(root, STAGING_DIRNAME)
+        ensure_dir(stage)
+        kws = pick_keywords_for_today(pool, k=k, path=os.path.join(root, ".last_cats.json"),
+                                      out_path=os.path.join(stage, ".last_cats.json"))
+        journal_append({"ev": "plan", "site": site, "keywords": kws})
+    return kws
+
+def pick_products(state: dict, site: str, keywords: list[str], target_count: int | None = None, cache: dict | None = None) -> list:
+    """저널에 선정 상품이 있으면 그대로(재개 시 페이지/인덱스 일관성 유지), 없으면 선정 후 기록."""
+    products = state["picked"].get(site)
+    if products is None:
+        products = fetch_random_products(keywords, target_count, cache)
+        journal_append({"ev": "pick", "site": site, "products": products})
+    return products
 # ===== 6) HTML 생성(홈: 제목/이미지=내부, 버튼=쿠팡) =====
-def build_html(products):
+def build_html(products, site_url: str | None = None, keywords: list[str] | None = None):
+    site_url = site_url or SITE_URL
     seo_title = "오늘의 셀렉션 30 | YourShop"
     seo_description = "에디터가 엄선한 오늘의 셀렉션 30. 프리미엄 큐레이션으로 합리적인 쇼핑을 도와드립니다."
-    seo_keywords = ",".join(SEARCH_KEYWORDS[:20])
+    seo_keywords = ",".join((keywords or SEARCH_KEYWORDS)[:20])
     og_image = ""
     if products:
         og_image = (products[0].get("imageUrl")
@@ -448,8 +580,8 @@ def build_html(products):
     <meta property="og:title" content="{seo_title}">
     <meta property="og:description" content="{seo_description}">
     <meta property="og:image" content="{og_image}">
-    <meta property="og:url" content="{SITE_URL}">
-    <link rel="canonical" href="{SITE_URL}">
+    <meta property="og:url" content="{site_url}">
+    <link rel="canonical" href="{site_url}">
     <meta name="twitter:card" content="summary_large_image">
 
     <style>
@@ -522,14 +654,18 @@ def build_html(products):
     return html
 
 # ===== 7) Sitemap / Robots =====
-def build_sitemap(products):
-    urls = [SITE_URL]  # 홈
-
-    # /p 상세 페이지들 포함(인덱싱 가속)
-    if os.path.isdir("p"):
-        for name in os.listdir("p"):
-            if name.endswith(".html"):
-                urls.append(f"{SITE_URL}p/{name}")
+def build_sitemap(products, site_url: str | None = None, root: str = ".", staging: str | None = None):
+    site_url = site_url or SITE_URL
+    urls = [site_url]  # 홈
+
+    # /p 상세 페이지들 포함(인덱싱 가속) — 기존 페이지 + 스왑 대기 중인 스테이징 페이지
+    names = set()
+    for base in (root, staging):
+        p_dir = os.path.join(base, "p") if base else None
+        if p_dir and os.path.isdir(p_dir):
+            names.update(n for n in os.listdir(p_dir) if n.endswith(".html"))
+    for name in sorted(names):
+        urls.append(f"{site_url}p/{name}")
 
     xml = '<?xml version="1.0" encoding="UTF-8"?>\n'
     xml += '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
@@ -539,33 +675,186 @@ def build_sitemap(products):
     xml += "</urlset>"
     return xml
 
-def build_robots():
+def build_robots(site_url: str | None = None):
+    site_url = site_url or SITE_URL
     return f"""User-agent: *
 Allow: /
-Sitemap: {SITE_URL}sitemap.xml
+Sitemap: {site_url}sitemap.xml
 """
 
-# ===== 8) 메인 =====
-if __name__ == "__main__":
-    ensure_dir("p")  # 상세 폴더 선생성
-    products = fetch_random_products()
-    write_product_detail_pages(products)  # /p/*.html 생성
+def write_site_outputs(products, site_url: str | None = None, root: str = ".", keywords: list[str] | None = None,
+                       site: str = "", done: set | None = None):
+    """
+    사이트 1개 분량 출력을 {root}/.staging 에 쓴다: p/*.html, index.html, sitemap.xml, robots.txt, .last_run
+    실제 경로 반영은 swap_staged_outputs()가 모든 사이트를 한 번에 처리.
+    """
+    stage = os.path.join(root, STAGING_DIRNAME)
+    ensure_dir(os.path.join(stage, "p"))  # 상세 폴더 선생성
+    write_product_detail_pages(products, site_url, stage, site, done)  # /p/*.html 생성
 
-    html = build_html(products)
-    sitemap = build_sitemap(products)
-    robots = build_robots()
+    html = build_html(products, site_url, keywords)
+    sitemap = build_sitemap(products, site_url, root, stage)
+    robots = build_robots(site_url)
 
-    with open("index.html", "w", encoding="utf-8") as f:
-        f.write(html)
-    with open("sitemap.xml", "w", encoding="utf-8") as f:
-        f.write(sitemap)
-    with open("robots.txt", "w", encoding="utf-8") as f:
-        f.write(robots)
+    for name, body in (("index.html", html), ("sitemap.xml", sitemap), ("robots.txt", robots)):
+        with open(os.path.join(stage, name), "w", encoding="utf-8") as f:
+            f.write(body)
 
     # 항상 변경을 만들어 커밋 보장
     build_ts = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
-    with open(".last_run", "w", encoding="utf-8") as f:
+    with open(os.path.join(stage, ".last_run"), "w", encoding="utf-8") as f:
         f.write(build_ts)
 
-    print("[OK] index.html/sitemap.xml/robots.txt written")
+def _apply_swap(files: list):
+    # 스테이징 원본은 남겨 둔 채 복사 → 도중에 죽어도 목록 전체를 처음부터 다시 적용 가능
+    for src, dst in files:
+        ensure_dir(os.path.dirname(dst) or ".")
+        tmp = dst + ".tmp"
+        shutil.copyfile(src, tmp)
+        with open(tmp, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, dst)  # 같은 파일시스템 내 원자적 교체
+
+def swap_staged_outputs(roots: list[str]):
+    """
+    각 출력 루트의 .staging 내용을 실제 경로로 일괄 교체.
+    교체 목록을 먼저 저널에 남기고(redo), 스테이징은 전부 적용한 뒤에만 지우므로
+    도중에 죽어도 다음 실행이 같은 목록을 처음부터 다시 적용한다(새 체크아웃이어도 스테이징만 있으면 됨).
+    상세 페이지를 먼저, index/sitemap 등은 나중에 교체해 새 인덱스가 없는 페이지를 가리키지 않게 한다.
+    """
+    files = []
+    for root in roots:
+        stage = os.path.join(root, STAGING_DIRNAME)
+        for dirpath, _, names in os.walk(stage):
+            for name in names:
+                src = os.path.join(dirpath, name)
+                files.append([src, os.path.join(root, os.path.relpath(src, stage))])
+    files.sort(key=lambda sd: os.path.basename(os.path.dirname(sd[0])) != "p")
+    swap = {"roots": list(roots), "files": files}
+    journal_append({"ev": "swap", **swap})
+    finish_swap(swap)
+
+def finish_swap(swap: dict) -> bool:
+    """
+    저널의 swap 기록을 처음부터 적용하고 스테이징/저널 정리(재실행해도 안전).
+    스테이징 원본이 하나라도 없으면(캐시 유실 등) 아무것도 적용하지 않고 폐기 → False(다시 렌더 필요).
+    """
+    missing = [src for src, _ in swap["files"] if not os.path.exists(src)]
+    if missing:
+        print("[WARN] staged outputs missing, swap discarded:", len(missing), missing[:3])
+    else:
+        _apply_swap(swap["files"])
+    for root in swap["roots"]:
+        shutil.rmtree(os.path.join(root, STAGING_DIRNAME), ignore_errors=True)
+    journal_clear()
+    return not missing
+
+# ===== 7.5) 멀티 사이트: fetch/캐시 1회 → 사이트별 출력 병렬 렌더 =====
+SITES_FILE = os.getenv("SITES_FILE", "")                # 설정 JSON 경로(없으면 단일 사이트 모드)
+SITE_WORKERS = int(os.getenv("SITE_WORKERS", "4"))      # 사이트 렌더 병렬 수
+
+def load_sites(path: str) -> list[dict]:
+    """
+    사이트 설정 JSON(list)을 읽는다. 항목 형식:
+      {"name": "shop-b", "site_url": "https://.../", "keywords": [...], "count": 20, "out_dir": "sites/shop-b"}
+    site_url만 필수. keywords 기본=BIG_CATEGORY_POOL, count 기본=TARGET_COUNT, out_dir 기본=name.
+    name/out_dir는 사이트마다 달라야 함(같은 파일 동시 쓰기, 저널 키 충돌 방지).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f) or []
+    sites, seen_names, seen_dirs = [], set(), set()
+    for i, s in enumerate(raw):
+        site_url = (s.get("site_url") or "").strip()
+        if not site_url:
+            raise ValueError(f"{path}: sites[{i}] site_url is required")
+        if not site_url.endswith("/"):
+            site_url += "/"
+        name = s.get("name") or f"site{i}"
+        out_dir = s.get("out_dir") or name
+        norm_dir = os.path.normcase(os.path.abspath(out_dir))
+        if name in seen_names:
+            raise ValueError(f"{path}: sites[{i}] duplicate name {name!r}")
+        if norm_dir in seen_dirs:
+            raise ValueError(f"{path}: sites[{i}] duplicate out_dir {out_dir!r}")
+        seen_names.add(name)
+        seen_dirs.add(norm_dir)
+        sites.append({
+            "name":     name,
+            "site_url": site_url,
+            "keywords": list(s.get("keywords") or BIG_CATEGORY_POOL),
+            "count":    int(s.get("count") or TARGET_COUNT),
+            "out_dir":  out_dir,
+        })
+    return sites
+
+def run_multi_site(sites: list[dict], state: dict | None = None):
+    """
+    1) 사이트별 오늘 키워드 선택(쿨다운 기록은 out_dir별)
+    2) 전체 키워드 합집합을 키워드당 한 번만 API 호출 → 공유 캐시
+    3) 사이트별 상품 선택 후 출력 렌더를 스레드로 병렬 실행(각 out_dir/.staging)
+    4) 모든 사이트가 성공하면 스테이징을 한 번에 스왑
+    상품 dict는 캐시에 있는 것을 그대로 참조(사이트별 URL은 렌더 시 계산, 원본 수정 없음).
+    state: journal_load() 결과 → 완료된 키워드/선정/페이지는 건너뜀.
+    """
+    state = state or journal_load("")
+    journal_begin(state, [site["out_dir"] for site in sites])
+    plan = []
+    for site in sites:
+        ensure_dir(site["out_dir"])
+        k = min(KEYWORDS_PER_RUN, len(site["keywords"]))
+        plan.append((site, plan_keywords(state, site["name"], site["keywords"], k=k, root=site["out_dir"])))
+
+    # 선정이 저널에 남은 사이트는 결과를 쓸 일이 없으므로 호출 대상에서 제외
+    cache = dict(state["fetched"])
+    pending = [kws for site, kws in plan if site["name"] not in state["picked"]]
+    for kw in dict.fromkeys(kw for kws in pending for kw in kws):
+        fetch_keyword_items(kw, cache)
+    if DEBUG:
+        print(f"[MULTI] sites={len(sites)} keywords_fetched={len(cache)}")
+
+    jobs = [(site, pick_products(state, site["name"], kws, site["count"], cache)) for site, kws in plan]
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, min(SITE_WORKERS, len(jobs)))) as ex:
+        futs = {
+            ex.submit(write_site_outputs, products, site["site_url"], site["out_dir"], site["keywords"],
+                      site["name"], state["pages"]): site
+            for site, products in jobs
+        }
+        for fut in as_completed(futs):
+            site = futs[fut]
+            try:
+                fut.result()
+                print(f"[OK] site={site['name']} staged -> {site['out_dir']}")
+            except Exception as e:
+                print("[WARN] site render fail:", site["name"], e)
+                failed.append(site["name"])
+
+    if failed:
+        # 스왑하지 않고 저널/스테이징 유지 → 재실행 시 이어서 진행. 비정상 종료로 CI 커밋 단계 차단
+        print("[ERROR] site render failed, swap skipped (resume on next run):", failed)
+        sys.exit(1)
+    swap_staged_outputs([site["out_dir"] for site in sites])
+
+# ===== 8) 메인 =====
+if __name__ == "__main__":
+    state = journal_load()
+    done_today = False
+    if state["swap"] is not None:
+        # 직전 실행이 스왑 도중 중단 → 스테이징에서 목록 전체를 다시 적용
+        if finish_swap(state["swap"]):
+            print("[OK] resumed interrupted swap")
+            done_today = state["resumed"]  # 오늘 런이었다면 이미 완료, 옛 런이었다면 새로 진행
+        state = journal_load()
+    if done_today:
+        pass
+    elif SITES_FILE:
+        run_multi_site(load_sites(SITES_FILE), state)
+    else:
+        journal_begin(state, ["."])
+        keywords = plan_keywords(state, "", BIG_CATEGORY_POOL, k=KEYWORDS_PER_RUN)
+        products = pick_products(state, "", keywords, TARGET_COUNT, dict(state["fetched"]))
+        write_site_outputs(products, done=state["pages"])
+        swap_staged_outputs(["."])
+        print("[OK] index.html/sitemap.xml/robots.txt written")
     print("== DEBUG END ==")